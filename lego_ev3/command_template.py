@@ -0,0 +1,74 @@
+"""
+This module contains the helper used to pre-build the direct commands sent to the EV3 brick
+
+A command template is a function which builds the bytes of a single direct command.
+Every constant part of the command is joined together ahead of time,
+so calling the template only encodes the arguments which actually change
+"""
+import typing
+
+import ev3_dc
+
+# the markers which can be used in place of literal bytes in a template
+LCX = 'lcx'     # the argument is an integer, encoded with ev3_dc.LCX
+RAW = 'raw'     # the argument is already encoded bytes, and is used as is
+
+_ENCODERS = {
+    LCX: 'ev3_dc.LCX({})',
+    RAW: '{}',
+}
+
+
+def make_template(
+        parts: typing.List[typing.Union[bytes, typing.Tuple[str, int]]]
+) -> typing.Callable[..., bytes]:
+    """
+    Builds a function which creates a direct command from its arguments
+
+    Example:
+        play_tone = make_template([
+            ev3_dc.opSound + ev3_dc.TONE,
+            (LCX, 0),  # VOLUME
+            (LCX, 1),  # FREQUENCY
+            (LCX, 2),  # DURATION
+        ])
+        ops = play_tone(50, 440, 1000)
+
+    :param parts: the parts of the command in order. Each part is either literal bytes,
+    or a (marker, argument index) pair for a value which is passed in
+    when the template is called (see the LCX and RAW markers)
+    """
+    literals = []
+    pieces = []
+    arg_count = 0
+    pending = b''
+
+    for part in parts:
+        if isinstance(part, bytes):
+            # neighbouring literals are merged so that they are only joined once
+            pending += part
+            continue
+
+        marker, index = part
+        if pending:
+            pieces.append('_lit{}'.format(len(literals)))
+            literals.append(pending)
+            pending = b''
+
+        pieces.append(_ENCODERS[marker].format('arg{}'.format(index)))
+        arg_count = max(arg_count, index + 1)
+
+    if pending:
+        pieces.append('_lit{}'.format(len(literals)))
+        literals.append(pending)
+
+    # the template is generated as straight-line code so that calling it does no extra work
+    source = 'def template({}):\n    return b\'\'.join(({},))\n'.format(
+        ', '.join('arg{}'.format(index) for index in range(arg_count)),
+        ', '.join(pieces)
+    )
+    namespace = {'_lit{}'.format(index): literal for index, literal in enumerate(literals)}
+    namespace['ev3_dc'] = ev3_dc
+    exec(source, namespace)     # noqa
+
+    return namespace['template']
@@ -137,3 +137,18 @@ class SoundFile(enum.Enum):
     POWER_DOWN = "./ui/PowerDown"
     STARTUP = "./ui/Startup"
     CLICK = "./ui/Click"
+
+
+# value to member maps for the enums which are built from every sensor reading
+# indexing these skips the comparatively slow Enum constructor
+Color._lookup = Color._value2member_map_
+BeaconButtons._lookup = BeaconButtons._value2member_map_
+
+# the file names are encoded for the brick once, instead of on every draw/play
+for _image in DrawableImage:
+    _image._lcs = ev3_dc.LCS(_image.value)
+
+for _sound in SoundFile:
+    _sound._lcs = ev3_dc.LCS(_sound.value)
+
+del _image, _sound
@@ -4,18 +4,125 @@ This module contains the class definition for the EV3 Programmable Brick
 Bricks tested with this class:
   - 95646
 """
+import concurrent.futures
+import contextlib
+import functools
 import struct
+import threading
 import typing
 import warnings
 
 import ev3_dc
 
+import PyRSquared.lego_ev3.command_template as command_template
 import PyRSquared.lego_ev3.enums as enums
 
 if typing.TYPE_CHECKING:
     import PyRSquared.lego_ev3.motor.motor as motor
     import PyRSquared.lego_ev3.sensor.sensor as sensor
 
+# encoded arguments which every call of the display and sensor commands would otherwise rebuild
+_LCX0 = ev3_dc.LCX(0)
+_LCX1 = ev3_dc.LCX(1)
+_LCX_COLOR = {color: ev3_dc.LCX(color.value) for color in enums.DrawableColor}
+
+# the pre-built commands, where only the arguments passed by the caller are encoded per call
+_DISPLAY_IMAGE_TEMPLATE = command_template.make_template([
+    ev3_dc.opUI_Draw,
+    ev3_dc.TOPLINE,
+    _LCX0,  # ENABLE
+    ev3_dc.opUI_Draw,
+    ev3_dc.BMPFILE,
+    (command_template.RAW, 0),  # COLOR
+    (command_template.LCX, 1),  # X0
+    (command_template.LCX, 2),  # Y0
+    (command_template.RAW, 3),  # NAME
+    ev3_dc.opUI_Draw,
+    ev3_dc.UPDATE
+])
+_DISPLAY_LINE_TEMPLATE = command_template.make_template([
+    ev3_dc.opUI_Draw,
+    ev3_dc.LINE,
+    (command_template.RAW, 0),  # COLOR
+    (command_template.LCX, 1),  # X0
+    (command_template.LCX, 2),  # Y0
+    (command_template.LCX, 3),  # X1
+    (command_template.LCX, 4),  # Y1
+    ev3_dc.opUI_Draw,
+    ev3_dc.UPDATE,
+])
+_PLAY_TONE_TEMPLATE = command_template.make_template([
+    ev3_dc.opSound,
+    ev3_dc.TONE,
+    (command_template.LCX, 0),  # VOLUME
+    (command_template.LCX, 1),  # FREQUENCY
+    (command_template.LCX, 2),  # DURATION
+])
+_PLAY_SOUND_TEMPLATE = command_template.make_template([
+    ev3_dc.opSound,
+    (command_template.RAW, 0),  # PLAY or REPEAT
+    (command_template.LCX, 1),  # VOLUME
+    (command_template.RAW, 2)  # NAME
+])
+
+# the commands which never change, so they are only built once
+_CLEAR_DISPLAY_OPS = {
+    color: b''.join([
+        ev3_dc.opUI_Draw,
+        ev3_dc.TOPLINE,
+        _LCX1,
+        ev3_dc.opUI_Draw,
+        ev3_dc.FILLWINDOW,
+        _LCX_COLOR[color],  # COLOR
+        _LCX0,
+        _LCX0,
+        ev3_dc.opUI_Draw,
+        ev3_dc.UPDATE
+    ])
+    for color in enums.DrawableColor
+}
+_STOP_SOUND_OPS = b''.join([
+    ev3_dc.opSound,
+    ev3_dc.BREAK
+])
+_GET_BRICK_NAME_OPS = b''.join([
+    ev3_dc.opCom_Get,
+    ev3_dc.GET_BRICKNAME,
+    ev3_dc.LCX(16),  # LENGTH
+    ev3_dc.GVX(0)  # NAME
+])
+
+# the brick accepts direct commands of up to 1024 bytes,
+# 7 of which are used by the header which ev3_dc adds to the operations
+_MAX_OPS_LENGTH = 1024 - 7
+
+# decodes the fixed size replies read back from the brick
+_UNPACK_16S = struct.Struct('16s').unpack
+
+
+@functools.lru_cache(maxsize=None)
+def _unpack_floats(count: int) -> typing.Callable[[bytes], typing.Tuple[float, ...]]:
+    """
+    Returns the (compiled once) unpack function for a reply of the specified number of floats
+    :param count: the number of little endian floats in the reply
+    """
+    return struct.Struct('<{}f'.format(count)).unpack
+
+
+# maps each (LightColor, LightEffect) pair to the LED mode sent to the brick
+# any pair which is not listed (ex. OFF with any effect) turns the lights off
+_LIGHT_MODE = {
+    (enums.LightColor.RED, enums.LightEffect.SOLID): ev3_dc.LED_RED,
+    (enums.LightColor.RED, enums.LightEffect.FLASH): ev3_dc.LED_RED_FLASH,
+    (enums.LightColor.RED, enums.LightEffect.PULSE): ev3_dc.LED_RED_PULSE,
+    (enums.LightColor.ORANGE, enums.LightEffect.SOLID): ev3_dc.LED_ORANGE,
+    (enums.LightColor.ORANGE, enums.LightEffect.FLASH): ev3_dc.LED_ORANGE_FLASH,
+    (enums.LightColor.ORANGE, enums.LightEffect.PULSE): ev3_dc.LED_ORANGE_PULSE,
+    (enums.LightColor.GREEN, enums.LightEffect.SOLID): ev3_dc.LED_GREEN,
+    (enums.LightColor.GREEN, enums.LightEffect.FLASH): ev3_dc.LED_GREEN_FLASH,
+    (enums.LightColor.GREEN, enums.LightEffect.PULSE): ev3_dc.LED_GREEN_PULSE,
+}
+
 
 class EV3:
     """
@@ -34,9 +141,17 @@ class EV3:
         :param ev3: the EV3 object from the ev3_dc library
         """
         self.ev3 = ev3
+        self._send = ev3.send_direct_cmd
         self.motors = {}            # type: typing.Dict[enums.MotorPort, motor.Motor]
         self.sensors = {}            # type: typing.Dict[enums.SensorPort, sensor.Sensor]
 
+        # each thread collects its own batch (in its "buf" attribute),
+        # so that a batch on one thread does not affect commands sent from another
+        self._batch = threading.local()
+        self._running = set()       # type: typing.Set[motor.Motor]
+        # the I/O thread used by the async reads, which is created the first time it is needed
+        self._executor = None       # type: typing.Optional[concurrent.futures.Executor]
+
         self.actuator_map = ev3.sensors
 
     @classmethod
@@ -84,8 +199,23 @@ class EV3:
 
         Note: this method is wrapped by the "close" method for code clarity
         """
-        for motor_obj in self.motors.values():
-            motor_obj.stop()
+        try:
+            running = list(self._running)
+        except AttributeError:
+            # the constructor did not finish, so there is no connection to close
+            return
+
+        if self._executor is not None:
+            # the garbage collector may run this on the I/O thread itself,
+            # which can not wait for its own shutdown
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        # only the motors which are still spinning need to be stopped,
+        # and all of them are stopped with a single direct command
+        with self.batch():
+            for motor_obj in running:
+                motor_obj.stop()
 
         self.ev3.__del__()
 
@@ -96,10 +226,107 @@ class EV3:
         may persist after the program is run which will cause re-connection issues
         See "Note 1" in the bluetooth_connection class method
 
-        Note: this functionality is the default destructor functionality
+        Note: this functionality is the default destructor functionality,
+        except that close also waits for any reads which are still running on the I/O thread
         """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
         self.__del__()
 
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Collects every command issued inside the "with" block and sends them
+        to the brick as a single direct command once the block exits.
+        This saves one round-trip to the brick for each batched command
+
+        Example:
+            with brick.batch():
+                brick.clear_display()
+                brick.display_line(0, 0, 177, 127)
+                brick.set_status_light(enums.LightColor.GREEN)
+
+        Note: the brick only accepts direct commands of up to 1 KB.
+        If the batched commands grow past this limit, the commands collected so far
+        are sent as one direct command, and a new one is started for the rest of the batch
+
+        Note: commands which read a value back from the brick
+        (ex. get_rotation, read_mode, get_brick_name) can not be used inside a batch,
+        and will raise a RuntimeError if they are.
+        A batch only collects the commands issued by the thread which opened it
+        """
+        if getattr(self._batch, 'buf', None) is not None:
+            # nested batches are folded into the outer batch
+            yield
+            return
+
+        self._batch.buf = bytearray()
+        try:
+            yield
+            ops = bytes(self._batch.buf)
+        finally:
+            self._batch.buf = None
+
+        if ops:
+            self._send(ops)
+
+    def _emit(self, ops: bytes, wait: bool = False):
+        """
+        Sends a direct command which has no reply to the brick,
+        or adds it to the current batch if one is being collected
+        :param ops: the operations to send
+        :param wait: If the call should block until the brick has finished executing the command
+        (inside a batch, the brick still finishes the command before moving on to the next one)
+        """
+        batch_buf = getattr(self._batch, 'buf', None)
+        if batch_buf is not None:
+            if batch_buf and len(batch_buf) + len(ops) > _MAX_OPS_LENGTH:
+                # the brick would reject a direct command this large, so the batch is split
+                self._send(bytes(batch_buf))
+                batch_buf.clear()
+
+            batch_buf += ops
+            return
+
+        if wait:
+            self._send(ops, sync_mode=ev3_dc.SYNC)
+        else:
+            self._send(ops)
+
+    def _query(self, ops: bytes, global_mem: int) -> bytes:
+        """
+        Sends a direct command to the brick and returns its reply
+        :param ops: the operations to send
+        :param global_mem: the number of bytes of global memory the reply is read into
+
+        :raises RuntimeError: If called while a batch is being collected on the same thread
+        """
+        if getattr(self._batch, 'buf', None) is not None:
+            raise RuntimeError(
+                "Values can not be read from the brick inside a batch. "
+                "Read the value before or after the 'with brick.batch()' block"
+            )
+
+        return self._send(ops, global_mem=global_mem)
+
+    def _submit(self, fn: typing.Callable, *args) -> concurrent.futures.Future:
+        """
+        Runs the specified function on this brick's I/O thread,
+        and returns a future which will hold its result
+        The I/O thread is created the first time this is called,
+        and runs the submitted requests one at a time, in the order they were submitted
+        :param fn: the function to run
+        :param args: the arguments to pass to the function
+        """
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="EV3-IO"
+            )
+
+        return self._executor.submit(fn, *args)
+
     def add_motor(self, port: enums.MotorPort, motor_object: 'motor.Motor'):
         """
         This method adds a motor to the brick.
@@ -122,12 +349,12 @@ class EV3:
         Note that a sensor will not work unless it has been added to an EV3 brick
         This is done automatically in the Sensor class constructor
 
-        Note: if you add two motors on the same port,
+        Note: if you add two sensors on the same port,
         a warning will be raised (but not an exception)
         :param port: the port the sensor is connected to
         :param sensor_object: the sensor object to add
         """
-        if port in self.motors:
+        if port in self.sensors:
             warnings.warn("The specified port '{}' already has a sensor assigned.".format(port))
 
         self.sensors[port] = sensor_object
@@ -140,31 +367,7 @@ class EV3:
         :param color: The color to set the lights to (or OFF to turn off the lights)
         :param effect: The effect to run the lights as
         """
-        mode = ev3_dc.LED_OFF
-
-        if color == enums.LightColor.RED:
-            if effect == enums.LightEffect.SOLID:
-                mode = ev3_dc.LED_RED
-            elif effect == enums.LightEffect.FLASH:
-                mode = ev3_dc.LED_RED_FLASH
-            elif effect == enums.LightEffect.PULSE:
-                mode = ev3_dc.LED_RED_PULSE
-
-        elif color == enums.LightColor.ORANGE:
-            if effect == enums.LightEffect.SOLID:
-                mode = ev3_dc.LED_ORANGE
-            elif effect == enums.LightEffect.FLASH:
-                mode = ev3_dc.LED_ORANGE_FLASH
-            elif effect == enums.LightEffect.PULSE:
-                mode = ev3_dc.LED_ORANGE_PULSE
-
-        elif color == enums.LightColor.GREEN:
-            if effect == enums.LightEffect.SOLID:
-                mode = ev3_dc.LED_GREEN
-            elif effect == enums.LightEffect.FLASH:
-                mode = ev3_dc.LED_GREEN_FLASH
-            elif effect == enums.LightEffect.PULSE:
-                mode = ev3_dc.LED_GREEN_PULSE
+        mode = _LIGHT_MODE.get((color, effect), ev3_dc.LED_OFF)
 
         ops = b''.join([
             ev3_dc.opUI_Write,
@@ -172,7 +375,7 @@ class EV3:
             mode,
         ])
 
-        self.ev3.send_direct_cmd(ops)
+        self._emit(ops)
 
     def display_image(
             self, image: enums.DrawableImage, x_pos: int = 0, y_pos: int = 0,
@@ -185,20 +388,7 @@ class EV3:
         :param y_pos: the y position to display the image
         :param color: The color to draw the image as (black - default, or white)
         """
-        ops = b''.join([
-            ev3_dc.opUI_Draw,
-            ev3_dc.TOPLINE,
-            ev3_dc.LCX(0),  # ENABLE
-            ev3_dc.opUI_Draw,
-            ev3_dc.BMPFILE,
-            ev3_dc.LCX(color.value),  # COLOR
-            ev3_dc.LCX(x_pos),  # X0
-            ev3_dc.LCX(y_pos),  # Y0
-            ev3_dc.LCS(image.value),  # NAME
-            ev3_dc.opUI_Draw,
-            ev3_dc.UPDATE
-        ])
-        self.ev3.send_direct_cmd(ops)
+        self._emit(_DISPLAY_IMAGE_TEMPLATE(_LCX_COLOR[color], x_pos, y_pos, image._lcs))
 
     def clear_display(
             self, color: enums.DrawableColor = enums.DrawableColor.WHITE
@@ -206,19 +396,7 @@ class EV3:
         """
         Clears the display by filling it with the specified color (black, or white - default)
         """
-        ops = b''.join([
-            ev3_dc.opUI_Draw,
-            ev3_dc.TOPLINE,
-            ev3_dc.LCX(1),
-            ev3_dc.opUI_Draw,
-            ev3_dc.FILLWINDOW,
-            ev3_dc.LCX(color.value),
-            ev3_dc.LCX(0),
-            ev3_dc.LCX(0),
-            ev3_dc.opUI_Draw,
-            ev3_dc.UPDATE
-        ])
-        self.ev3.send_direct_cmd(ops)
+        self._emit(_CLEAR_DISPLAY_OPS[color])
 
     def display_line(
             self, x_1: int, y_1: int, x_2: int, y_2: int,
@@ -232,18 +410,7 @@ class EV3:
         :param y_2: the ending y position of the line
         :param color: the color to draw the line as (black - default, or white)
         """
-        ops = b''.join([
-            ev3_dc.opUI_Draw,
-            ev3_dc.LINE,
-            ev3_dc.LCX(color.value),  # COLOR
-            ev3_dc.LCX(x_1),  # X0
-            ev3_dc.LCX(y_1),  # Y0
-            ev3_dc.LCX(x_2),  # X1
-            ev3_dc.LCX(y_2),  # Y1
-            ev3_dc.opUI_Draw,
-            ev3_dc.UPDATE,
-        ])
-        self.ev3.send_direct_cmd(ops)
+        self._emit(_DISPLAY_LINE_TEMPLATE(_LCX_COLOR[color], x_1, y_1, x_2, y_2))
 
     def simulate_button_press(self, button: enums.Buttons, wait_for_completion: bool = True):
         """
@@ -267,7 +434,7 @@ class EV3:
                 ev3_dc.WAIT_FOR_PRESS,
             ])
 
-        self.ev3.send_direct_cmd(ops)
+        self._emit(ops)
 
     def play_tone(self, volume: int, frequency: int, duration: int):
         """
@@ -278,14 +445,7 @@ class EV3:
         This can range from 250 - 10000
         :param duration: The total amount of time to play the tone for in ms
         """
-        ops = b''.join([
-            ev3_dc.opSound,
-            ev3_dc.TONE,
-            ev3_dc.LCX(volume),  # VOLUME
-            ev3_dc.LCX(frequency),  # FREQUENCY
-            ev3_dc.LCX(duration),  # DURATION
-        ])
-        self.ev3.send_direct_cmd(ops)
+        self._emit(_PLAY_TONE_TEMPLATE(volume, frequency, duration))
 
     def play_sound(self, sound_file: enums.SoundFile, volume: int, repeat: bool = False):
         """
@@ -296,35 +456,49 @@ class EV3:
         :param repeat: If the sound should be repeated forever after it is played
         Use the "stop_sound" method to stop playing the sound
         """
-        ops = b''.join([
-            ev3_dc.opSound,
-            ev3_dc.REPEAT if repeat else ev3_dc.PLAY,
-            ev3_dc.LCX(volume),  # VOLUME
-            ev3_dc.LCS(sound_file.value)  # NAME
-        ])
-        self.ev3.send_direct_cmd(ops)
+        self._emit(_PLAY_SOUND_TEMPLATE(
+            ev3_dc.REPEAT if repeat else ev3_dc.PLAY, volume, sound_file._lcs
+        ))
 
     def stop_sound(self):
         """
         Stops all sounds from being played from the EV3 brick
         """
-        ops = b''.join([
-            ev3_dc.opSound,
-            ev3_dc.BREAK
-        ])
-        self.ev3.send_direct_cmd(ops)
+        self._emit(_STOP_SOUND_OPS)
 
     def get_brick_name(self) -> str:
         """
         Returns the name assigned to the EV3 brick,
         which is set in the EV3 brick's settings
         """
-        ops = b''.join([
-            ev3_dc.opCom_Get,
-            ev3_dc.GET_BRICKNAME,
-            ev3_dc.LCX(16),  # LENGTH
-            ev3_dc.GVX(0)  # NAME
-        ])
-        reply = self.ev3.send_direct_cmd(ops, global_mem=16)
-        (brick_name,) = struct.unpack('16s', reply)
+        reply = self._query(_GET_BRICK_NAME_OPS, 16)
+        (brick_name,) = _UNPACK_16S(reply)
         return brick_name.split(b'\x00')[0].decode("ascii")
+
+    def read_sensors(
+            self, sensors: typing.List[typing.Tuple['sensor.Sensor', int]]
+    ) -> typing.List[float]:
+        """
+        Reads a single value from each of the specified sensors using one direct command,
+        which is much faster than calling read_mode on each sensor one at a time
+
+        Example:
+            light, distance = brick.read_sensors([(color_sensor, 0), (ir_sensor, 0)])
+
+        :param sensors: a list of (sensor, mode) pairs to read
+        :return: the value read from each sensor, in the same order as the sensors
+        """
+        if not sensors:
+            return []
+
+        ops = b''.join(
+            sensor_obj._read_mode_prefix + b''.join([
+                ev3_dc.LCX(mode),  # MODE
+                _LCX1,  # VALUES
+                ev3_dc.GVX(index * 4),  # VALUE1
+            ])
+            for index, (sensor_obj, mode) in enumerate(sensors)
+        )
+
+        reply = self._query(ops, len(sensors) * 4)
+        return list(_unpack_floats(len(sensors))(reply))
@@ -6,16 +6,24 @@ Motors tested with this class:
   - 99455
 """
 import struct
-import time
 import typing
 
 import ev3_dc
 
+import PyRSquared.lego_ev3.command_template as command_template
 import PyRSquared.lego_ev3.enums as enums
 
 if typing.TYPE_CHECKING:
     import PyRSquared.lego_ev3.ev3 as ev3
 
+# decodes the fixed size replies read back from the brick (the EV3 is little endian)
+_UNPACK_F = struct.Struct('<f').unpack
+
+# encoded arguments which are shared by most of the commands (LAYER, VALUES and VALUE1)
+_LCX0 = ev3_dc.LCX(0)
+_LCX1 = ev3_dc.LCX(1)
+_GVX0 = ev3_dc.GVX(0)
+
 
 class Motor:
     """
@@ -34,33 +42,104 @@ class Motor:
         self.ev3 = ev3_parent
         self.port = port
 
+        # bound once to save the attribute lookups on every command
+        self._emit = ev3_parent._emit
+        self._query = ev3_parent._query
+
+        # the encoded port bytes never change, so they are only built once
+        self._port_lcx = ev3_dc.LCX(port.value)
+        # there is no input port for MotorPort.ALL, so its rotation can not be read
+        self._port_motor_input = (
+            None if port == enums.MotorPort.ALL else ev3_dc.port_motor_input(port.value)
+        )
+
+        # the commands are built once around the only arguments which change between calls
+        start_ops = b''.join([
+            ev3_dc.opOutput_Start,
+            _LCX0,  # LAYER
+            self._port_lcx  # NOS
+        ])
+        ready_ops = b''.join([
+            ev3_dc.opOutput_Ready,
+            _LCX0,  # LAYER
+            self._port_lcx  # NOS
+        ])
+        self._rotate_template = command_template.make_template([
+            ev3_dc.opOutput_Speed,
+            _LCX0,  # LAYER
+            self._port_lcx,  # NOS
+            (command_template.LCX, 0),  # SPEED
+            start_ops
+        ])
+        self._rotate_for_time_template = command_template.make_template([
+            ev3_dc.opOutput_Time_Speed,
+            _LCX0,  # LAYER
+            self._port_lcx,  # NOS
+            (command_template.LCX, 0),  # SPEED
+            _LCX0,  # STEP1 - ramp up ms
+            (command_template.LCX, 1),  # STEP2 - steady ms
+            _LCX0,  # STEP3 - ramp down ms
+            _LCX0,  # BRAKE
+            start_ops,
+            ready_ops
+        ])
+        self._rotate_degrees_template = command_template.make_template([
+            ev3_dc.opOutput_Step_Speed,
+            _LCX0,  # LAYER
+            self._port_lcx,  # NOS
+            (command_template.LCX, 0),  # SPEED
+            _LCX0,  # STEP1 - ramp up degrees
+            (command_template.LCX, 1),  # STEP2 - steady degrees
+            _LCX0,  # STEP3 - ramp down degrees
+            _LCX0,  # BRAKE
+            start_ops,
+            ready_ops
+        ])
+        self._stop_ops = b''.join([
+            ev3_dc.opOutput_Stop,
+            _LCX0,  # LAYER
+            self._port_lcx,  # NOS
+            _LCX0  # BRAKE
+        ])
+        self._get_rotation_ops = None
+        if self._port_motor_input is not None:
+            self._get_rotation_ops = b''.join([
+                ev3_dc.opInput_Device,
+                ev3_dc.READY_SI,
+                _LCX0,  # LAYER
+                self._port_motor_input,  # NO
+                ev3_dc.LCX(7),  # TYPE
+                _LCX0,  # MODE
+                _LCX1,  # VALUES
+                _GVX0,  # VALUE1
+            ])
+
         self.ev3.add_motor(port, self)
 
         self.max_rpm = None
 
     def rotate_degrees(self, speed: int, angle: float):
         """
-        Rotates the motor by the specified number of degrees at the specified
-        NOTE: This is not usually 100% accurate
-
+        Rotates the motor by the specified number of degrees at the specified speed.
+        The rotation is measured by the motor itself, and this command will block execution
+        until the brick reports that the rotation is complete.
+        If the speed is 0, or the angle rounds to 0 degrees, nothing is sent to the brick
         :param speed: The speed as a percentage
-        :param angle: The angle to rotate in degrees
-
-        :raises NotImplementedError: If the Motor class is instantiated directly.
-        To use this functionality, instantiate either the LargeMotor or MediumMotor class.
+        :param angle: The angle to rotate in degrees (negative angles rotate backwards)
         """
-        if self.max_rpm is None:
-            raise NotImplementedError(
-                "Max RPM must be set in order to use this function. "
-                "Please use the LargeMotor or MediumMotor class "
-                "(they are child classes so no code changes are required) "
-                "to take advantage of this functionality"
-            )
+        if angle < 0:
+            speed, angle = -speed, -angle
 
-        rpm = (speed / 100) * self.max_rpm
-        seconds_per_degree = 1 / (rpm * 6)
+        steps = int(round(angle))
+        if speed == 0 or steps == 0:
+            # the brick would never report this as complete, which blocks forever
+            return
 
-        self.rotate_for_time(speed, seconds_per_degree * angle)
+        # the motor counts as running until the brick reports the rotation is complete,
+        # so that it is still stopped on close if the wait is interrupted
+        self.ev3._running.add(self)
+        self._emit(self._rotate_degrees_template(speed, steps), wait=True)
+        self.ev3._running.discard(self)
 
     def rotate(self, speed: int):
         """
@@ -69,57 +148,53 @@ class Motor:
         the .close() method is called on the brick, or the program is terminated cleanly
         :param speed: The speed as a percentage
         """
-        ops = b''.join([
-            ev3_dc.opOutput_Speed,
-            ev3_dc.LCX(0),  # LAYER
-            ev3_dc.LCX(self.port.value),  # NOS
-            ev3_dc.LCX(speed),  # SPEED
-            ev3_dc.opOutput_Start,
-            ev3_dc.LCX(0),                       # LAYER
-            ev3_dc.LCX(self.port.value)  # NOS
-        ])
-        self.ev3.ev3.send_direct_cmd(ops)
+        self._emit(self._rotate_template(speed))
+        self.ev3._running.add(self)
 
     def rotate_for_time(self, speed: int, duration: float):
         """
         Begins rotating this motor at the specified speed for the specified amount of time.
-        Note that this command will block execution.
+        The time is measured by the brick itself, and this command will block execution
+        until the brick reports that the rotation is complete.
+        If the duration rounds to 0 ms, the motor is just stopped
         :param speed: The speed as a percentage
         :param duration: The time to spin for in seconds
+
+        :raises ValueError: If the duration is negative
         """
-        self.rotate(speed)
-        time.sleep(duration)
-        self.stop()
+        if duration < 0:
+            raise ValueError("The duration must not be negative")
+
+        milliseconds = int(round(duration * 1000))
+        if milliseconds == 0:
+            # a timed rotation with no steps at all is not a defined command
+            self.stop()
+            return
+
+        # the motor counts as running until the brick reports the rotation is complete,
+        # so that it is still stopped on close if the wait is interrupted
+        self.ev3._running.add(self)
+        self._emit(self._rotate_for_time_template(speed, milliseconds), wait=True)
+        self.ev3._running.discard(self)
 
     def stop(self):
         """
         Stops the motor from spinning
         """
-        ops = b''.join([
-            ev3_dc.opOutput_Stop,
-            ev3_dc.LCX(0),  # LAYER
-            ev3_dc.LCX(self.port.value),  # NOS
-            ev3_dc.LCX(0)  # BRAKE
-        ])
-        self.ev3.ev3.send_direct_cmd(ops)
+        self._emit(self._stop_ops)
+        self.ev3._running.discard(self)
 
     def get_rotation(self) -> float:
         """
         Returns the current motor rotation in degrees
+
+        :raises ValueError: If this motor is connected to MotorPort.ALL
         """
-        ops = b''.join([
-            ev3_dc.opInput_Device,
-            ev3_dc.READY_SI,
-            ev3_dc.LCX(0),  # LAYER
-            ev3_dc.port_motor_input(self.port.value),  # NO
-            ev3_dc.LCX(7),  # TYPE
-            ev3_dc.LCX(0),  # MODE
-            ev3_dc.LCX(1),  # VALUES
-            ev3_dc.GVX(0),  # VALUE1
-        ])
-        self.ev3.ev3.send_direct_cmd(ops)
-        reply = self.ev3.ev3.send_direct_cmd(ops, global_mem=4)
-        return struct.unpack('f', reply)[0]
+        if self._get_rotation_ops is None:
+            raise ValueError("The rotation of MotorPort.ALL can not be read")
+
+        reply = self._query(self._get_rotation_ops, 4)
+        return _UNPACK_F(reply)[0]
 
     def get_port(self) -> enums.MotorPort:
         """
@@ -40,8 +40,14 @@ class ColorSensor(sensor.Sensor):
         """
         Returns the color detected by the color sensor (see the Color enum)
         This can be one of 7 colors, or NO_COLOR if the color can not be resolved
+
+        :raises ValueError: If the sensor reports a value which is not a Color
         """
-        return enums.Color(int(self.read_mode(2)))
+        value = self.read_mode_raw_int(2)
+        try:
+            return enums.Color._lookup[value]
+        except KeyError:
+            raise ValueError("{} is not a valid Color".format(value)) from None
 
     def ambient_light_intensity(self) -> float:
         """
@@ -15,6 +15,41 @@ import PyRSquared.lego_ev3.sensor.sensor as sensor
 if typing.TYPE_CHECKING:
     import PyRSquared.lego_ev3.ev3 as ev3
 
+# decodes the fixed size replies read back from the brick (the EV3 is little endian)
+_UNPACK_8I = struct.Struct('<8i').unpack
+_UNPACK_4F = struct.Struct('<4f').unpack
+
+# encoded arguments which are shared by most of the commands (LAYER, VALUES and VALUE1)
+_LCX0 = ev3_dc.LCX(0)
+_LCX1 = ev3_dc.LCX(1)
+_GVX0 = ev3_dc.GVX(0)
+
+# maps each beacon button combination to the individual buttons which make it up
+_BUTTON_DECOMP = {
+    enums.BeaconButtons.NO_BUTTON: [],
+
+    enums.BeaconButtons.RED_UPPER: [enums.BeaconButtons.RED_UPPER],
+    enums.BeaconButtons.RED_LOWER: [enums.BeaconButtons.RED_LOWER],
+    enums.BeaconButtons.BLUE_UPPER: [enums.BeaconButtons.BLUE_UPPER],
+    enums.BeaconButtons.BLUE_LOWER: [enums.BeaconButtons.BLUE_LOWER],
+
+    enums.BeaconButtons.RED_UPPER_AND_BLUE_UPPER:
+        [enums.BeaconButtons.RED_UPPER, enums.BeaconButtons.BLUE_UPPER],
+    enums.BeaconButtons.RED_UPPER_AND_BLUE_LOWER:
+        [enums.BeaconButtons.RED_UPPER, enums.BeaconButtons.BLUE_LOWER],
+    enums.BeaconButtons.RED_LOWER_AND_BLUE_UPPER:
+        [enums.BeaconButtons.RED_LOWER, enums.BeaconButtons.BLUE_UPPER],
+    enums.BeaconButtons.RED_LOWER_AND_BLUE_LOWER:
+        [enums.BeaconButtons.RED_LOWER, enums.BeaconButtons.BLUE_LOWER],
+
+    enums.BeaconButtons.BEACON: [enums.BeaconButtons.BEACON],
+
+    enums.BeaconButtons.RED_UPPER_AND_RED_LOWER:
+        [enums.BeaconButtons.RED_UPPER, enums.BeaconButtons.RED_LOWER],
+    enums.BeaconButtons.BLUE_UPPER_AND_BLUE_LOWER:
+        [enums.BeaconButtons.BLUE_UPPER, enums.BeaconButtons.BLUE_LOWER],
+}
+
 
 class InfraredSensor(sensor.Sensor):
     """
@@ -32,6 +67,38 @@ class InfraredSensor(sensor.Sensor):
         super().__init__(ev3_parent, port)
         self.type_number = 33
 
+        # the beacon commands have no arguments, so they are only built once
+        self._beacon_proximity_ops = b''.join([
+            ev3_dc.opInput_Device,
+            ev3_dc.READY_RAW,
+            _LCX0,  # LAYER
+            self._port_lcx,  # NO
+            self._type_lcx,  # TYPE - IR
+            _LCX1,  # MODE - Seeker
+            ev3_dc.LCX(8),  # VALUES
+            _GVX0,  # VALUE1 - heading   channel 1
+            ev3_dc.GVX(4),  # VALUE2 - proximity channel 1
+            ev3_dc.GVX(8),  # VALUE3 - heading   channel 2
+            ev3_dc.GVX(12),  # VALUE4 - proximity channel 2
+            ev3_dc.GVX(16),  # VALUE5 - heading   channel 3
+            ev3_dc.GVX(20),  # VALUE6 - proximity channel 3
+            ev3_dc.GVX(24),  # VALUE5 - heading   channel 4
+            ev3_dc.GVX(28)  # VALUE6 - proximity channel 4
+        ])
+        self._beacon_buttons_ops = b''.join([
+            ev3_dc.opInput_Device,
+            ev3_dc.READY_SI,
+            _LCX0,  # LAYER
+            self._port_lcx,  # NO
+            self._type_lcx,
+            ev3_dc.LCX(2),
+            ev3_dc.LCX(4),  # VALUES
+            _GVX0,  # VALUE1
+            ev3_dc.GVX(4),  # VALUE1
+            ev3_dc.GVX(8),  # VALUE1
+            ev3_dc.GVX(16),  # VALUE1
+        ])
+
     def get_distance(self) -> float:
         """
         Returns the approximate distance to an object placed in front of the sensor
@@ -56,25 +123,8 @@ class InfraredSensor(sensor.Sensor):
 
         :param channel: the channel of the beacon to listen on
         """
-        ops_read = b''.join([
-            ev3_dc.opInput_Device,
-            ev3_dc.READY_RAW,
-            ev3_dc.LCX(0),  # LAYER
-            ev3_dc.LCX(self.port.value),  # NO
-            ev3_dc.LCX(self.type_number),  # TYPE - IR
-            ev3_dc.LCX(1),  # MODE - Seeker
-            ev3_dc.LCX(8),  # VALUES
-            ev3_dc.GVX(0),  # VALUE1 - heading   channel 1
-            ev3_dc.GVX(4),  # VALUE2 - proximity channel 1
-            ev3_dc.GVX(8),  # VALUE3 - heading   channel 2
-            ev3_dc.GVX(12),  # VALUE4 - proximity channel 2
-            ev3_dc.GVX(16),  # VALUE5 - heading   channel 3
-            ev3_dc.GVX(20),  # VALUE6 - proximity channel 3
-            ev3_dc.GVX(24),  # VALUE5 - heading   channel 4
-            ev3_dc.GVX(28)  # VALUE6 - proximity channel 4
-        ])
-        reply = self.ev3.ev3.send_direct_cmd(ops_read, global_mem=32)
-        states = struct.unpack('8i', reply)
+        reply = self._query(self._beacon_proximity_ops, 32)
+        states = _UNPACK_8I(reply)
 
         return states[channel.value * 2], states[channel.value * 2 + 1]
 
@@ -89,24 +139,16 @@ class InfraredSensor(sensor.Sensor):
         To get a list of individual pressed buttons, use the get_beacon_buttons method
 
         :param channel: the channel of the beacon to listen on
-        """
-        ops_read = b''.join([
-            ev3_dc.opInput_Device,
-            ev3_dc.READY_SI,
-            ev3_dc.LCX(0),  # LAYER
-            ev3_dc.LCX(self.port.value),  # NO
-            ev3_dc.LCX(self.type_number),
-            ev3_dc.LCX(2),
-            ev3_dc.LCX(4),  # VALUES
-            ev3_dc.GVX(0),  # VALUE1
-            ev3_dc.GVX(4),  # VALUE1
-            ev3_dc.GVX(8),  # VALUE1
-            ev3_dc.GVX(16),  # VALUE1
-        ])
 
-        reply = self.ev3.ev3.send_direct_cmd(ops_read, global_mem=16)
-        button_data = struct.unpack('4f', reply)
-        return enums.BeaconButtons(int(button_data[channel.value]))
+        :raises ValueError: If the sensor reports a value which is not a BeaconButtons
+        """
+        reply = self._query(self._beacon_buttons_ops, 16)
+        button_data = _UNPACK_4F(reply)
+        value = int(button_data[channel.value])
+        try:
+            return enums.BeaconButtons._lookup[value]
+        except KeyError:
+            raise ValueError("{} is not a valid BeaconButtons".format(value)) from None
 
     def get_beacon_buttons(
             self, channel: enums.BeaconChannel
@@ -115,29 +157,4 @@ class InfraredSensor(sensor.Sensor):
         Returns a list of all the buttons currently pressed by the beacon, or
         an empty list if no buttons are pressed
         """
-        pressed = self.get_beacon_buttons_raw(channel)
-
-        result = []
-
-        if pressed.value <= 4 or pressed.value == 9:
-            result = [pressed]
-
-        elif pressed == enums.BeaconButtons.RED_UPPER_AND_BLUE_UPPER:
-            result = [enums.BeaconButtons.RED_UPPER, enums.BeaconButtons.BLUE_UPPER]
-
-        elif pressed == enums.BeaconButtons.RED_UPPER_AND_BLUE_LOWER:
-            result = [enums.BeaconButtons.RED_UPPER, enums.BeaconButtons.BLUE_LOWER]
-
-        elif pressed == enums.BeaconButtons.RED_LOWER_AND_BLUE_UPPER:
-            result = [enums.BeaconButtons.RED_LOWER, enums.BeaconButtons.BLUE_UPPER]
-
-        elif pressed == enums.BeaconButtons.RED_LOWER_AND_BLUE_LOWER:
-            result = [enums.BeaconButtons.RED_LOWER, enums.BeaconButtons.BLUE_LOWER]
-
-        elif pressed == enums.BeaconButtons.RED_UPPER_AND_RED_LOWER:
-            result = [enums.BeaconButtons.RED_UPPER, enums.BeaconButtons.RED_LOWER]
-
-        elif pressed == enums.BeaconButtons.BLUE_UPPER_AND_BLUE_LOWER:
-            result = [enums.BeaconButtons.BLUE_UPPER, enums.BeaconButtons.BLUE_LOWER]
-
-        return result
+        return list(_BUTTON_DECOMP[self.get_beacon_buttons_raw(channel)])
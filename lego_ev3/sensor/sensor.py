@@ -8,6 +8,7 @@ Sensors tested with children of this class:
   - 95648
 """
 import abc
+import concurrent.futures
 import struct
 import typing
 
@@ -18,6 +19,15 @@ import PyRSquared.lego_ev3.enums as enums
 if typing.TYPE_CHECKING:
     import PyRSquared.lego_ev3.ev3 as ev3
 
+# decodes the fixed size replies read back from the brick (the EV3 is little endian)
+_UNPACK_F = struct.Struct('<f').unpack
+_UNPACK_I = struct.Struct('<i').unpack
+
+# encoded arguments which are shared by most of the commands (LAYER, VALUES and VALUE1)
+_LCX0 = ev3_dc.LCX(0)
+_LCX1 = ev3_dc.LCX(1)
+_GVX0 = ev3_dc.GVX(0)
+
 
 class Sensor(abc.ABC):
     """
@@ -35,28 +45,95 @@ class Sensor(abc.ABC):
         """
         self.ev3 = ev3_parent
         self.port = port
+
+        # bound once to save the attribute lookups on every command
+        self._query = ev3_parent._query
+
+        # the encoded port and type bytes never change, so they are only built once
+        # (the type bytes are built when a child class sets type_number)
+        self._port_lcx = ev3_dc.LCX(port.value)
+        self._read_mode_suffix = b''.join([
+            _LCX1,  # VALUES
+            _GVX0,  # VALUE1
+        ])
         self.type_number = None
 
         self.ev3.add_sensor(port, self)
 
-    def read_mode(self, mode: int) -> float:
+    @property
+    def type_number(self) -> typing.Optional[int]:
         """
-        Reads and returns a single 4 bit float from the EV3 brick stored at the specified mode
-        :param mode: The mode to read
+        The sensor type number of this sensor type
+        Setting this also pre-builds the parts of the read commands which depend on it
         """
-        ops_read = b''.join([
+        return self._type_number
+
+    @type_number.setter
+    def type_number(self, type_number: typing.Optional[int]):
+        self._type_number = type_number
+
+        if type_number is None:
+            self._type_lcx = None       # type: typing.Optional[bytes]
+            self._read_mode_prefix = None       # type: typing.Optional[bytes]
+            self._read_mode_raw_prefix = None       # type: typing.Optional[bytes]
+            return
+
+        self._type_lcx = ev3_dc.LCX(type_number)
+
+        self._read_mode_prefix = b''.join([
             ev3_dc.opInput_Device,
             ev3_dc.READY_SI,
-            ev3_dc.LCX(0),  # LAYER
-            ev3_dc.LCX(self.port.value),  # NO
-            ev3_dc.LCX(self.type_number),
-            ev3_dc.LCX(mode),
-            ev3_dc.LCX(1),  # VALUES
-            ev3_dc.GVX(0),  # VALUE1
+            _LCX0,  # LAYER
+            self._port_lcx,  # NO
+            self._type_lcx,
+        ])
+        self._read_mode_raw_prefix = b''.join([
+            ev3_dc.opInput_Device,
+            ev3_dc.READY_RAW,
+            _LCX0,  # LAYER
+            self._port_lcx,  # NO
+            self._type_lcx,
         ])
 
-        reply = self.ev3.ev3.send_direct_cmd(ops_read, global_mem=4)
-        return struct.unpack('f', reply)[0]
+    def read_mode(self, mode: int) -> float:
+        """
+        Reads and returns a single 4 bit float from the EV3 brick stored at the specified mode
+        :param mode: The mode to read
+        """
+        ops_read = self._read_mode_prefix + ev3_dc.LCX(mode) + self._read_mode_suffix
+
+        reply = self._query(ops_read, 4)
+        return _UNPACK_F(reply)[0]
+
+    def read_mode_raw_int(self, mode: int) -> int:
+        """
+        Reads and returns a single raw 4 byte integer from the EV3 brick
+        stored at the specified mode
+        This skips the conversion to a float for modes which only ever report whole numbers
+        :param mode: The mode to read
+        """
+        ops_read = self._read_mode_raw_prefix + ev3_dc.LCX(mode) + self._read_mode_suffix
+
+        reply = self._query(ops_read, 4)
+        return _UNPACK_I(reply)[0]
+
+    def read_mode_async(self, mode: int) -> concurrent.futures.Future:
+        """
+        Starts reading a single 4 bit float from the EV3 brick stored at the specified mode,
+        and returns a future which will hold the value once the brick replies
+        This allows other work (or other reads) to be done while waiting for the brick
+
+        Example:
+            distance = ir_sensor.read_mode_async(0)
+            light = color_sensor.read_mode_async(0)
+            ...
+            print(distance.result(), light.result())
+
+        Note: the read runs on the brick's I/O thread,
+        so it is not affected by a batch which is open on the calling thread
+        :param mode: The mode to read
+        """
+        return self.ev3._submit(self.read_mode, mode)
 
     def get_type_number(self):
         """
@@ -0,0 +1,292 @@
+"""
+Tests for the EV3 brick, motor and sensor classes
+These use a stub in place of the ev3_dc connection, so no brick is needed
+"""
+import struct
+import threading
+import unittest
+
+import ev3_dc
+
+import PyRSquared.lego_ev3.enums as enums
+from PyRSquared.lego_ev3 import EV3, LargeMotor, ColorSensor, Sensor
+
+
+class StubConnection:
+    """
+    Records every direct command sent to it, and replies with zeroed global memory
+    (or with the bytes in reply, if it is set)
+    """
+    sensors = {}
+
+    def __init__(self):
+        self.sent = []
+        self.reply = None
+
+    def send_direct_cmd(self, ops, **kwargs):
+        self.sent.append((ops, kwargs))
+        if self.reply is not None:
+            return self.reply
+        return bytes(kwargs.get('global_mem', 0))
+
+    def __del__(self):
+        pass
+
+
+class EV3TestCase(unittest.TestCase):
+    def setUp(self):
+        self.connection = StubConnection()
+        self.brick = EV3(self.connection)
+
+    def test_get_rotation_sends_one_command(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_A)
+        self.connection.sent.clear()
+
+        self.assertEqual(motor.get_rotation(), 0.0)
+        self.assertEqual(len(self.connection.sent), 1)
+        self.assertEqual(self.connection.sent[0][1], {'global_mem': 4})
+
+    def test_rotate_for_time_command(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_B)
+        self.connection.sent.clear()
+
+        motor.rotate_for_time(-50, 1.5)
+
+        self.assertEqual(self.connection.sent, [(b''.join([
+            ev3_dc.opOutput_Time_Speed,
+            ev3_dc.LCX(0),  # LAYER
+            ev3_dc.LCX(2),  # NOS
+            ev3_dc.LCX(-50),  # SPEED
+            ev3_dc.LCX(0),  # STEP1
+            ev3_dc.LCX(1500),  # STEP2
+            ev3_dc.LCX(0),  # STEP3
+            ev3_dc.LCX(0),  # BRAKE
+            ev3_dc.opOutput_Start,
+            ev3_dc.LCX(0),  # LAYER
+            ev3_dc.LCX(2),  # NOS
+            ev3_dc.opOutput_Ready,
+            ev3_dc.LCX(0),  # LAYER
+            ev3_dc.LCX(2),  # NOS
+        ]), {'sync_mode': ev3_dc.SYNC})])
+
+    def test_rotate_for_time_at_zero_speed_still_waits(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_B)
+        self.connection.sent.clear()
+
+        motor.rotate_for_time(0, 1)
+
+        self.assertEqual(len(self.connection.sent), 1)
+        self.assertEqual(self.connection.sent[0][0][:1], ev3_dc.opOutput_Time_Speed)
+
+    def test_rotate_for_no_time_stops_motor(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_B)
+        motor.rotate(50)
+        self.connection.sent.clear()
+
+        motor.rotate_for_time(50, 0)
+
+        self.assertEqual(self.connection.sent, [(motor._stop_ops, {})])
+        with self.assertRaises(ValueError):
+            motor.rotate_for_time(50, -1)
+
+    def test_rotate_degrees_command(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_B)
+        self.connection.sent.clear()
+
+        motor.rotate_degrees(30, -90)
+
+        self.assertEqual(self.connection.sent, [(b''.join([
+            ev3_dc.opOutput_Step_Speed,
+            ev3_dc.LCX(0),  # LAYER
+            ev3_dc.LCX(2),  # NOS
+            ev3_dc.LCX(-30),  # SPEED
+            ev3_dc.LCX(0),  # STEP1
+            ev3_dc.LCX(90),  # STEP2
+            ev3_dc.LCX(0),  # STEP3
+            ev3_dc.LCX(0),  # BRAKE
+            ev3_dc.opOutput_Start,
+            ev3_dc.LCX(0),  # LAYER
+            ev3_dc.LCX(2),  # NOS
+            ev3_dc.opOutput_Ready,
+            ev3_dc.LCX(0),  # LAYER
+            ev3_dc.LCX(2),  # NOS
+        ]), {'sync_mode': ev3_dc.SYNC})])
+
+    def test_rotate_degrees_which_can_not_finish_sends_nothing(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_B)
+        self.connection.sent.clear()
+
+        motor.rotate_degrees(0, 90)
+        motor.rotate_degrees(50, 0.3)
+
+        self.assertEqual(self.connection.sent, [])
+
+    def test_batch_sends_one_command(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_A)
+        self.connection.sent.clear()
+
+        with self.brick.batch():
+            self.brick.clear_display()
+            self.brick.play_tone(50, 440, 1000)
+            motor.rotate(50)
+
+        self.assertEqual(len(self.connection.sent), 1)
+
+        self.brick.clear_display()
+        self.brick.play_tone(50, 440, 1000)
+        motor.rotate(50)
+        self.assertEqual(
+            self.connection.sent[0][0],
+            b''.join(ops for ops, _ in self.connection.sent[1:])
+        )
+
+    def test_empty_batch_sends_nothing(self):
+        with self.brick.batch():
+            pass
+
+        self.assertEqual(self.connection.sent, [])
+
+    def test_batch_splits_oversized_commands(self):
+        with self.brick.batch():
+            for _ in range(200):
+                self.brick.display_line(0, 0, 100, 100)
+
+        self.assertGreater(len(self.connection.sent), 1)
+        for ops, _ in self.connection.sent:
+            self.assertLessEqual(len(ops), 1024 - 7)
+
+    def test_read_inside_batch_raises(self):
+        sensor = ColorSensor(self.brick, enums.SensorPort.PORT_1)
+
+        with self.assertRaises(RuntimeError):
+            with self.brick.batch():
+                sensor.reflected_light_intensity()
+
+        self.assertEqual(self.connection.sent, [])
+        self.assertEqual(sensor.reflected_light_intensity(), 0.0)
+
+    def test_close_stops_only_running_motors_in_one_command(self):
+        motor_a = LargeMotor(self.brick, enums.MotorPort.PORT_A)
+        motor_b = LargeMotor(self.brick, enums.MotorPort.PORT_B)
+        motor_c = LargeMotor(self.brick, enums.MotorPort.PORT_C)
+        LargeMotor(self.brick, enums.MotorPort.PORT_D)
+        motor_a.rotate(50)
+        motor_b.rotate(50)
+        motor_c.rotate(50)
+        motor_b.stop()
+        self.connection.sent.clear()
+
+        self.brick.close()
+
+        self.assertEqual(len(self.connection.sent), 1)
+        ops, _ = self.connection.sent[0]
+        self.assertIn(ops, [
+            motor_a._stop_ops + motor_c._stop_ops,
+            motor_c._stop_ops + motor_a._stop_ops,
+        ])
+
+    def test_close_sends_nothing_without_running_motors(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_A)
+        motor.rotate(50)
+        motor.stop()
+        self.connection.sent.clear()
+
+        self.brick.close()
+
+        self.assertEqual(self.connection.sent, [])
+
+    def test_close_stops_motor_after_interrupted_move(self):
+        motor = LargeMotor(self.brick, enums.MotorPort.PORT_A)
+
+        def interrupted(ops, **kwargs):
+            raise KeyboardInterrupt
+
+        self.brick._send = interrupted
+        with self.assertRaises(KeyboardInterrupt):
+            motor.rotate_degrees(50, 100000)
+
+        self.brick._send = self.connection.send_direct_cmd
+        self.brick.close()
+
+        self.assertEqual(self.connection.sent, [(motor._stop_ops, {})])
+
+    def test_async_read_ignores_batch_on_other_thread(self):
+        sensor = ColorSensor(self.brick, enums.SensorPort.PORT_1)
+        batch_open = threading.Event()
+
+        # hold the I/O thread until the batch is open, so the read runs inside it
+        self.brick._submit(batch_open.wait)
+        future = sensor.read_mode_async(0)
+
+        with self.brick.batch():
+            batch_open.set()
+            self.assertEqual(future.result(timeout=5), 0.0)
+            self.brick.clear_display()
+
+        self.assertEqual(len(self.connection.sent), 2)
+        self.brick.close()
+
+    def test_subclass_setting_type_number_can_read(self):
+        class GyroSensor(Sensor):
+            def __init__(self, ev3_parent, port):
+                super().__init__(ev3_parent, port)
+                self.type_number = 32
+
+        gyro = GyroSensor(self.brick, enums.SensorPort.PORT_4)
+        self.connection.sent.clear()
+
+        self.assertEqual(gyro.read_mode(0), 0.0)
+        self.assertEqual(self.brick.read_sensors([(gyro, 1)]), [0.0])
+        self.assertEqual(self.connection.sent[0][0], b''.join([
+            ev3_dc.opInput_Device,
+            ev3_dc.READY_SI,
+            ev3_dc.LCX(0),  # LAYER
+            ev3_dc.LCX(3),  # NO
+            ev3_dc.LCX(32),  # TYPE
+            ev3_dc.LCX(0),  # MODE
+            ev3_dc.LCX(1),  # VALUES
+            ev3_dc.GVX(0),  # VALUE1
+        ]))
+
+    def test_read_sensors_packs_one_command(self):
+        sensors = [
+            ColorSensor(self.brick, enums.SensorPort.PORT_1),
+            ColorSensor(self.brick, enums.SensorPort.PORT_2),
+            ColorSensor(self.brick, enums.SensorPort.PORT_3),
+        ]
+        self.connection.sent.clear()
+        self.connection.reply = struct.pack('<3f', 1.5, 2.5, 3.5)
+
+        values = self.brick.read_sensors([(sensors[0], 0), (sensors[1], 1), (sensors[2], 2)])
+
+        self.assertEqual(values, [1.5, 2.5, 3.5])
+        self.assertEqual(self.connection.sent, [(b''.join(
+            b''.join([
+                ev3_dc.opInput_Device,
+                ev3_dc.READY_SI,
+                ev3_dc.LCX(0),  # LAYER
+                ev3_dc.LCX(index),  # NO
+                ev3_dc.LCX(29),  # TYPE
+                ev3_dc.LCX(index),  # MODE
+                ev3_dc.LCX(1),  # VALUES
+                ev3_dc.GVX(index * 4),  # VALUE1
+            ])
+            for index in range(3)
+        ), {'global_mem': 12})])
+
+    def test_unexpected_color_raises_value_error(self):
+        sensor = ColorSensor(self.brick, enums.SensorPort.PORT_1)
+        self.connection.reply = struct.pack('<i', 42)
+
+        with self.assertRaises(ValueError):
+            sensor.color()
+
+
+class EnumTestCase(unittest.TestCase):
+    def test_file_names_are_pre_encoded(self):
+        for member in list(enums.DrawableImage) + list(enums.SoundFile):
+            self.assertEqual(member._lcs, ev3_dc.LCS(member.value))
+
+
+if __name__ == '__main__':
+    unittest.main()